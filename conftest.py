@@ -0,0 +1,31 @@
+"""
+Shared pytest setup for the SEC-API test suites
+"""
+
+import os
+import pytest
+import requests
+
+SEC_API_ENDPOINT = "https://api.sec-api.io"
+LIVENESS_TIMEOUT = 3.0  # seconds
+
+def pytest_configure(config):
+    """Load .env and stop the whole run up front if the SEC-API key is missing."""
+    # --help, --version and --collect-only don't call the API, so they don't need a key
+    if config.option.help or config.option.version or config.option.collectonly:
+        return
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if not os.getenv("SEC_API_KEY"):
+        pytest.exit("SEC_API_KEY must be set in .env file", returncode=1)
+
+@pytest.fixture(scope="session", autouse=True)
+def sec_api_live():
+    """Probe SEC-API once and skip every test if it can't be reached."""
+    try:
+        # Any HTTP response means the service is up; only connection failures skip
+        requests.get(SEC_API_ENDPOINT, timeout=LIVENESS_TIMEOUT)
+    except requests.RequestException:
+        pytest.skip("SEC-API unreachable")
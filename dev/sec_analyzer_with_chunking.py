@@ -6,13 +6,22 @@ Implements a contextual chunking strategy for handling large documents.
 """
 
 import os
+import re
+import json
+import time
+import hashlib
 import logging
+import orjson
+import tiktoken
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Any, Optional, List
 from dotenv import load_dotenv
 from sec_api import QueryApi, ExtractorApi, XbrlApi
 from langchain.agents import AgentType, initialize_agent
 from langchain.tools import StructuredTool
 from langchain_openai import ChatOpenAI
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -34,6 +43,56 @@ query_api = QueryApi(api_key=SEC_API_KEY)
 extractor_api = ExtractorApi(api_key=SEC_API_KEY)
 xbrl_api = XbrlApi(api_key=SEC_API_KEY)
 
+@lru_cache(maxsize=4)
+def _get_llm(model: str, temperature: float = 0) -> ChatOpenAI:
+    """Return a shared ChatOpenAI client so its connection pool is reused across calls."""
+    return ChatOpenAI(temperature=temperature, model=model)
+
+#################################################
+# Response Cache
+#################################################
+CACHE_DIR = os.getenv("SEC_CACHE_DIR", ".cache")
+FILING_CACHE_TTL = 90 * 24 * 3600  # Filed documents are immutable
+QUERY_CACHE_TTL = 24 * 3600  # New filings may appear in search results
+
+class FileCache:
+    """File-backed JSON cache for SEC-API responses, keyed by call arguments."""
+    
+    def __init__(self, tool: str, ttl: int):
+        self.directory = os.path.join(CACHE_DIR, tool)
+        self.ttl = ttl
+    
+    def _path(self, kwargs: Dict[str, Any]) -> str:
+        key = hashlib.md5(orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def get(self, **kwargs) -> Optional[Any]:
+        """Return the cached response for these arguments, or None if missing or expired."""
+        try:
+            with open(self._path(kwargs), "rb") as f:
+                entry = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["ts"] >= self.ttl:
+            return None
+        return entry["data"]
+    
+    def set(self, data: Any, **kwargs) -> None:
+        """Store a response for these arguments."""
+        # A payload orjson can't encode raises JSONEncodeError, a TypeError.
+        # Serialize before opening the file so a failure leaves no empty entry behind
+        try:
+            entry = orjson.dumps({"ts": time.time(), "data": data})
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(kwargs), "wb") as f:
+                f.write(entry)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write cache entry: {str(e)}")
+
+query_cache = FileCache("query", QUERY_CACHE_TTL)
+extractor_cache = FileCache("extractor", FILING_CACHE_TTL)
+xbrl_cache = FileCache("xbrl", FILING_CACHE_TTL)
+
 #################################################
 # Tool 1: SEC Query API
 #################################################
@@ -62,8 +121,12 @@ def search_sec_filings(
             "sort": [{"filedAt": {"order": "desc"}}]
         }
         
-        # Call the API
-        filings = query_api.get_filings(search_params)
+        # Call the API, reusing a recent response for the same search
+        filings = query_cache.get(**search_params)
+        if filings is None:
+            filings = query_api.get_filings(search_params)
+            if filings:
+                query_cache.set(filings, **search_params)
         
         if not filings or "filings" not in filings or not filings["filings"]:
             return "No results found matching your criteria."
@@ -93,6 +156,45 @@ def search_sec_filings(
 #################################################
 # Tool 2: SEC Extractor API
 #################################################
+# sec.gov document URLs ending in .htm or .html, optionally with a query string
+_SEC_URL_RE = re.compile(r'https://www\.sec\.gov/\S+\.html?(?:\?\S*)?', re.IGNORECASE)
+
+# Section ID mappings for common sections
+_SECTION_NAME_MAPPING = MappingProxyType({
+    "1": "Business",
+    "1A": "Risk Factors",
+    "1B": "Unresolved Staff Comments",
+    "1C": "Cybersecurity",
+    "2": "Properties",
+    "3": "Legal Proceedings",
+    "4": "Mine Safety",
+    "5": "Market Information",
+    "6": "Selected Financial Data",
+    "7": "Management Discussion and Analysis",
+    "7A": "Market Risk",
+    "8": "Financial Statements",
+    "9": "Accountant Changes",
+    "9A": "Controls and Procedures",
+    "9B": "Other Information",
+    "10": "Directors and Officers",
+    "11": "Executive Compensation",
+    "12": "Security Ownership",
+    "13": "Related Transactions",
+    "14": "Principal Accountant Fees",
+    # 10-Q Sections
+    "part1item1": "Financial Statements",
+    "part1item2": "Management Discussion",
+    "part1item3": "Market Risk",
+    "part1item4": "Controls and Procedures",
+    "part2item1": "Legal Proceedings",
+    "part2item1a": "Risk Factors",
+    "part2item2": "Unregistered Sales",
+    "part2item3": "Defaults",
+    "part2item4": "Mine Safety",
+    "part2item5": "Other Information",
+    "part2item6": "Exhibits"
+})
+
 def extract_section(
     filing_url: str,
     section_id: str,
@@ -110,59 +212,27 @@ def extract_section(
         Dictionary with section content and metadata
     """
     try:
-        # Section ID mappings for common sections
-        section_name_mapping = {
-            "1": "Business",
-            "1A": "Risk Factors",
-            "1B": "Unresolved Staff Comments",
-            "1C": "Cybersecurity",
-            "2": "Properties",
-            "3": "Legal Proceedings",
-            "4": "Mine Safety",
-            "5": "Market Information",
-            "6": "Selected Financial Data",
-            "7": "Management Discussion and Analysis",
-            "7A": "Market Risk",
-            "8": "Financial Statements",
-            "9": "Accountant Changes",
-            "9A": "Controls and Procedures",
-            "9B": "Other Information",
-            "10": "Directors and Officers",
-            "11": "Executive Compensation",
-            "12": "Security Ownership",
-            "13": "Related Transactions",
-            "14": "Principal Accountant Fees",
-            # 10-Q Sections
-            "part1item1": "Financial Statements",
-            "part1item2": "Management Discussion",
-            "part1item3": "Market Risk",
-            "part1item4": "Controls and Procedures",
-            "part2item1": "Legal Proceedings",
-            "part2item1a": "Risk Factors",
-            "part2item2": "Unregistered Sales",
-            "part2item3": "Defaults",
-            "part2item4": "Mine Safety",
-            "part2item5": "Other Information",
-            "part2item6": "Exhibits"
-        }
-        
         # Fix section_id format - strip any "item_" prefix
         if section_id.startswith("item_"):
             logger.info(f"Converting section ID format from '{section_id}' to '{section_id[5:]}'")
             section_id = section_id[5:]  # Remove "item_" prefix
         
         # Verify URL format
-        if not filing_url.startswith("https://www.sec.gov/") or not (filing_url.endswith('.htm') or filing_url.endswith('.html')):
+        if not _SEC_URL_RE.fullmatch(filing_url):
             return {
                 "is_error": True,
                 "error": "Invalid URL format. Must be a sec.gov URL ending in .htm or .html",
                 "content": None,
                 "section_id": section_id,
-                "section_name": section_name_mapping.get(section_id, "Unknown Section")
+                "section_name": _SECTION_NAME_MAPPING.get(section_id, "Unknown Section")
             }
         
         # Extract section
-        section_content = extractor_api.get_section(filing_url, section_id, output_format)
+        section_content = extractor_cache.get(filing_url=filing_url, section_id=section_id, output_format=output_format)
+        if section_content is None:
+            section_content = extractor_api.get_section(filing_url, section_id, output_format)
+            if section_content:
+                extractor_cache.set(section_content, filing_url=filing_url, section_id=section_id, output_format=output_format)
         
         if not section_content or len(section_content.strip()) < 10:
             return {
@@ -171,7 +241,7 @@ def extract_section(
                 "content": None,
                 "is_empty": True,
                 "section_id": section_id,
-                "section_name": section_name_mapping.get(section_id, "Unknown Section"),
+                "section_name": _SECTION_NAME_MAPPING.get(section_id, "Unknown Section"),
                 "status": "Section exists but appears to be empty or not available"
             }
         
@@ -181,7 +251,7 @@ def extract_section(
             "content": section_content,
             "is_empty": False,
             "section_id": section_id,
-            "section_name": section_name_mapping.get(section_id, "Unknown Section"),
+            "section_name": _SECTION_NAME_MAPPING.get(section_id, "Unknown Section"),
             "status": "Success"
         }
     
@@ -192,13 +262,28 @@ def extract_section(
             "error": str(e),
             "content": None,
             "section_id": section_id,
-            "section_name": section_name_mapping.get(section_id, "Unknown Section"),
+            "section_name": _SECTION_NAME_MAPPING.get(section_id, "Unknown Section"),
             "status": "Error"
         }
 
 #################################################
 # Tool 3: SEC XBRL API (Financial Data)
 #################################################
+# Standardized statement names returned by the XBRL-to-JSON API
+_STATEMENT_KEYS = (
+    "CoverPage",
+    "StatementsOfIncome",
+    "StatementsOfIncomeParenthetical",
+    "StatementsOfComprehensiveIncome",
+    "StatementsOfComprehensiveIncomeParenthetical",
+    "BalanceSheets",
+    "BalanceSheetsParenthetical",
+    "StatementsOfCashFlows",
+    "StatementsOfCashFlowsParenthetical",
+    "StatementsOfShareholdersEquity",
+    "StatementsOfShareholdersEquityParenthetical"
+)
+
 def xbrl_to_json(
     htm_url: Optional[str] = None,
     xbrl_url: Optional[str] = None,
@@ -231,13 +316,17 @@ def xbrl_to_json(
                 "data": None
             }
         
-        # Call appropriate API method
-        if htm_url:
-            xbrl_data = xbrl_api.xbrl_to_json(htm_url=htm_url)
-        elif xbrl_url:
-            xbrl_data = xbrl_api.xbrl_to_json(xbrl_url=xbrl_url)
-        else:
-            xbrl_data = xbrl_api.xbrl_to_json(accession_no=accession_no)
+        # Call appropriate API method, reusing a cached conversion if available
+        xbrl_data = xbrl_cache.get(htm_url=htm_url, xbrl_url=xbrl_url, accession_no=accession_no)
+        if xbrl_data is None:
+            if htm_url:
+                xbrl_data = xbrl_api.xbrl_to_json(htm_url=htm_url)
+            elif xbrl_url:
+                xbrl_data = xbrl_api.xbrl_to_json(xbrl_url=xbrl_url)
+            else:
+                xbrl_data = xbrl_api.xbrl_to_json(accession_no=accession_no)
+            if xbrl_data:
+                xbrl_cache.set(xbrl_data, htm_url=htm_url, xbrl_url=xbrl_url, accession_no=accession_no)
         
         if not xbrl_data:
             return {
@@ -253,9 +342,7 @@ def xbrl_to_json(
         }
         
         # Find statements
-        for key in xbrl_data.keys():
-            if key.startswith("Statements") or key == "CoverPage":
-                financial_data["statements"].append(key)
+        financial_data["statements"] = [key for key in _STATEMENT_KEYS if key in xbrl_data]
         
         # Extract key metrics
         if "CoverPage" in xbrl_data:
@@ -299,15 +386,123 @@ def xbrl_to_json(
             "data": None
         }
 
+#################################################
+# Text Splitting
+#################################################
+# Separators tried in order when splitting a section into chunks
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+DEFAULT_CHUNK_SIZE = 6000  # Tokens per chunk
+DEFAULT_CHUNK_OVERLAP = 400  # Tokens of overlap between chunks for context
+SINGLE_CALL_MAX_CHUNKS = 4  # Max chunks analyzed and synthesized in one LLM call
+SINGLE_CALL_PROMPT_TOKENS = 300  # Tokens for the single-call instructions around the chunks
+SINGLE_CALL_CHUNK_REPLY_TOKENS = 500  # Reply tokens allowed for each chunk's analysis
+SINGLE_CALL_SYNTHESIS_TOKENS = 1000  # Reply tokens allowed for the synthesis
+CHUNK_ANALYSIS_CONCURRENCY = 8  # Max parallel LLM calls, keeps within OpenAI rate limits
+
+# Context window sizes by model name prefix; unknown models get the smallest
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-3.5-turbo": 16385
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Markdown headings or all-caps title lines such as "ITEM 1A: RISK FACTORS" or "MANAGEMENT'S DISCUSSION"
+_HEADING_RE = re.compile(r"^(?:#{1,6}\s|[A-Z][A-Z0-9 \-&,./()'’:]{4,}$)")
+
+@lru_cache(maxsize=4)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """Return the tokenizer for a model, falling back to cl100k_base for unknown models."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def _count_tokens(text: str) -> int:
+    """Count tokens in text using the tokenizer of the configured OpenAI model."""
+    return len(_get_encoding(OPENAI_MODEL).encode(text))
+
+def _context_tokens(model: str) -> int:
+    """Return the context window of a model, matching the longest known name prefix."""
+    prefixes = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix)]
+    if not prefixes:
+        return DEFAULT_CONTEXT_TOKENS
+    return MODEL_CONTEXT_TOKENS[max(prefixes, key=len)]
+
+@lru_cache(maxsize=8)
+def _get_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Return a shared text splitter for the given chunk size and overlap."""
+    return RecursiveCharacterTextSplitter(
+        separators=CHUNK_SEPARATORS,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=_count_tokens
+    )
+
+# Splitter for the default chunking parameters, built once at module load
+_get_text_splitter(DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+
 #################################################
 # New Tool 4: Section Extraction with Chunking
 #################################################
+def _chunk_content(content: str, chunk_size: int, chunk_overlap: int) -> Dict[str, Any]:
+    """
+    Split section content into chunks and describe each chunk.
+    
+    Args:
+        content: Full section text
+        chunk_size: Maximum size of each chunk in tokens
+        chunk_overlap: Number of tokens to overlap between chunks
+        
+    Returns:
+        Dictionary of chunking fields to merge into an extraction result
+    """
+    # Only apply chunking if content exceeds chunk_size
+    if _count_tokens(content) <= chunk_size:
+        return {"chunked": False, "chunk_count": 1}
+        
+    # Split content on paragraph, line, sentence and word boundaries
+    chunks = _get_text_splitter(chunk_size, chunk_overlap).split_text(content)
+    
+    # Create chunk metadata
+    chunks_metadata = []
+    for i, chunk in enumerate(chunks):
+        # Extract the first 3 headings, stopping once they are found
+        headings = []
+        for line in chunk.split('\n'):
+            if _HEADING_RE.match(line):
+                headings.append(line)
+                if len(headings) == 3:
+                    break
+        
+        # Preview of the first 100 chars, sliced before any other work
+        preview = chunk[:100].replace('\n', ' ')
+        if len(chunk) > 100:
+            preview += "..."
+        
+        chunks_metadata.append({
+            "chunk_index": i,
+            "length": len(chunk),
+            "headings": headings,
+            "preview": preview
+        })
+    
+    return {
+        "content": chunks,
+        "chunked": True,
+        "chunk_count": len(chunks),
+        "original_length": len(content),
+        "chunks_metadata": chunks_metadata
+    }
+
 def extract_section_with_chunking(
     filing_url: str,
     section_id: str,
     output_format: str = "text",
-    chunk_size: int = 8000,  # Characters per chunk
-    chunk_overlap: int = 500  # Overlap between chunks for context
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
 ) -> Dict[str, Any]:
     """
     Extract a section from an SEC filing and split into manageable chunks if needed.
@@ -317,8 +512,8 @@ def extract_section_with_chunking(
         filing_url: URL to the SEC filing (must be a sec.gov URL ending in .htm or .html)
         section_id: Section identifier (e.g., "7", "1A", "part2item1a")
         output_format: Either "text" or "html" format
-        chunk_size: Maximum size of each chunk in characters
-        chunk_overlap: Number of characters to overlap between chunks
+        chunk_size: Maximum size of each chunk in tokens
+        chunk_overlap: Number of tokens to overlap between chunks
         
     Returns:
         Dictionary with section content (potentially chunked) and metadata
@@ -330,77 +525,8 @@ def extract_section_with_chunking(
         # Return immediately if there was an error or empty content
         if result["is_error"] or result.get("is_empty", True) or not result["content"]:
             return result
-            
-        content = result["content"]
-        
-        # Only apply chunking if content exceeds chunk_size
-        if len(content) <= chunk_size:
-            result["chunked"] = False
-            result["chunk_count"] = 1
-            return result
-            
-        # Split content into paragraphs (respecting document structure)
-        paragraphs = []
-        for block in content.split('\n\n'):
-            # Further split if paragraphs are very long
-            if len(block) > chunk_size:
-                # Split on sentences for long paragraphs
-                sentences = []
-                for sentence in block.replace('\n', ' ').split('. '):
-                    if sentence:
-                        sentences.append(sentence + ('.' if not sentence.endswith('.') else ''))
-                paragraphs.extend(sentences)
-            else:
-                paragraphs.append(block)
-        
-        # Create chunks with overlap
-        chunks = []
-        current_chunk = ""
-        current_length = 0
-        
-        for paragraph in paragraphs:
-            # If adding this paragraph would exceed chunk_size, finalize the chunk
-            if current_length + len(paragraph) + 2 > chunk_size and current_length > 0:
-                chunks.append(current_chunk)
-                
-                # Start new chunk with overlap
-                overlap_point = max(0, len(current_chunk) - chunk_overlap)
-                current_chunk = current_chunk[overlap_point:] + "\n\n" + paragraph
-                current_length = len(current_chunk)
-            else:
-                # Add paragraph to current chunk
-                if current_length > 0:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
-                current_length = len(current_chunk)
-        
-        # Add the last chunk if not empty
-        if current_length > 0:
-            chunks.append(current_chunk)
-        
-        # Update result with chunks
-        result["content"] = chunks
-        result["chunked"] = True
-        result["chunk_count"] = len(chunks)
-        result["original_length"] = len(content)
-        
-        # Create chunk metadata
-        result["chunks_metadata"] = []
-        for i, chunk in enumerate(chunks):
-            # Extract key headings or first few lines for each chunk
-            lines = chunk.split('\n')
-            headings = [line for line in lines if line.isupper() or line.startswith('#') or line.startswith('##')]
-            
-            first_lines = lines[:min(3, len(lines))]
-            
-            result["chunks_metadata"].append({
-                "chunk_index": i,
-                "length": len(chunk),
-                "headings": headings[:3],  # First 3 headings
-                "preview": " ".join(first_lines)[:100] + "..."  # Preview of first 100 chars
-            })
         
+        result.update(_chunk_content(result["content"], chunk_size, chunk_overlap))
         return result
     
     except Exception as e:
@@ -416,12 +542,73 @@ def extract_section_with_chunking(
 #################################################
 # New Tool 5: Analyze Section with Chunking
 #################################################
+def _analyze_chunks_in_single_call(
+    llm: ChatOpenAI,
+    chunks: List[str],
+    section_label: str,
+    analysis_objective: str,
+    max_tokens: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Analyze all chunks and synthesize them with a single LLM call.
+    
+    Args:
+        llm: Chat model to use
+        chunks: Section content chunks
+        section_label: Section name used in the prompt
+        analysis_objective: What to analyze in the section
+        max_tokens: Reply length limit passed to the model
+        
+    Returns:
+        Dictionary with "chunk_analyses" and "synthesis", or None if the
+        response could not be parsed
+    """
+    tagged_chunks = "\n\n".join(
+        f"<CHUNK {i+1}>\n{chunk}\n</CHUNK {i+1}>" for i, chunk in enumerate(chunks)
+    )
+    prompt = f"""Analyze the {len(chunks)} parts of the {section_label} section below with objective: {analysis_objective}
+    
+    {tagged_chunks}
+    
+    First analyze each chunk on its own, focusing on key points and insights.
+    Then synthesize these analyses into one cohesive summary that addresses the original objective.
+    Avoid repetition and focus on the most important insights across all chunks.
+    Keep the whole reply under {max_tokens * 3 // 4} words.
+    
+    Reply with JSON only, in this exact format:
+    {{"chunks": ["analysis of chunk 1", "analysis of chunk 2", ...], "synthesis": "cohesive summary"}}
+    """
+    try:
+        message = llm.bind(max_tokens=max_tokens).invoke(prompt)
+        if message.response_metadata.get("finish_reason") == "length":
+            raise ValueError(f"Response exceeded {max_tokens} tokens")
+        response = message.content.strip()
+        
+        # Strip markdown code fences around the JSON
+        if response.startswith("```"):
+            response = response.split("\n", 1)[-1].rsplit("```", 1)[0]
+        
+        parsed = json.loads(response)
+        if len(parsed["chunks"]) != len(chunks) or not parsed["synthesis"]:
+            raise ValueError("Response does not match the number of chunks")
+        
+        return {
+            "chunk_analyses": [
+                {"chunk_index": i, "analysis": analysis}
+                for i, analysis in enumerate(parsed["chunks"])
+            ],
+            "synthesis": parsed["synthesis"]
+        }
+    except Exception as e:
+        logger.warning(f"Single-call chunk analysis failed, falling back to per-chunk analysis: {str(e)}")
+        return None
+
 def analyze_section_chunks(
     filing_url: str,
     section_id: str,
     analysis_objective: str = "Summarize key points and trends",
-    chunk_size: int = 8000,
-    chunk_overlap: int = 500
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
 ) -> Dict[str, Any]:
     """
     Extract and analyze a section by breaking it into manageable chunks.
@@ -430,19 +617,14 @@ def analyze_section_chunks(
         filing_url: URL to the SEC filing
         section_id: Section ID to extract
         analysis_objective: What to analyze in the section
-        chunk_size: Maximum size of each chunk
-        chunk_overlap: Overlap between chunks
+        chunk_size: Maximum size of each chunk in tokens
+        chunk_overlap: Number of tokens to overlap between chunks
         
     Returns:
         Analysis results with metadata
     """
-    # First extract the section with chunking
-    result = extract_section_with_chunking(
-        filing_url=filing_url,
-        section_id=section_id,
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
+    # First extract the section, then chunk the content it returned
+    result = extract_section(filing_url, section_id)
     
     if result["is_error"] or result.get("is_empty", True):
         return {
@@ -452,11 +634,19 @@ def analyze_section_chunks(
             "section_id": section_id
         }
     
-    # Create an agent for analysis
-    llm = ChatOpenAI(
-        temperature=0,
-        model=OPENAI_MODEL
-    )
+    try:
+        result.update(_chunk_content(result["content"], chunk_size, chunk_overlap))
+    except Exception as e:
+        logger.error(f"Error chunking section: {str(e)}")
+        return {
+            "is_error": True,
+            "error": f"Error in chunking process: {str(e)}",
+            "analysis": None,
+            "section_id": section_id
+        }
+    
+    # Get the shared LLM client for analysis
+    llm = _get_llm(OPENAI_MODEL)
     
     # If not chunked, analyze the whole section
     if not result.get("chunked", False):
@@ -465,7 +655,7 @@ def analyze_section_chunks(
         prompt = f"""Analyze this {result.get('section_name', section_id)} section with the objective: {analysis_objective}
         
         CONTENT:
-        {content[:12000]}  # Limit content length for LLM
+        {content}
         
         Provide a concise analysis focusing on the objective.
         """
@@ -491,41 +681,72 @@ def analyze_section_chunks(
     chunks = result["content"]
     chunk_analyses = []
     
-    # Analyze each chunk
-    for i, chunk in enumerate(chunks):
-        chunk_prompt = f"""Analyze part {i+1} of {len(chunks)} from {result.get('section_name', section_id)} section with objective: {analysis_objective}
+    # A few chunks that fit in one prompt with room for the reply are analyzed
+    # and synthesized in a single call
+    reply_tokens = len(chunks) * SINGLE_CALL_CHUNK_REPLY_TOKENS + SINGLE_CALL_SYNTHESIS_TOKENS
+    if (
+        len(chunks) <= SINGLE_CALL_MAX_CHUNKS
+        and sum(map(_count_tokens, chunks)) + SINGLE_CALL_PROMPT_TOKENS + reply_tokens <= _context_tokens(OPENAI_MODEL)
+    ):
+        batched = _analyze_chunks_in_single_call(
+            llm, chunks, result.get('section_name', section_id), analysis_objective, reply_tokens
+        )
+        if batched:
+            return {
+                "is_error": False,
+                "analysis": batched["synthesis"],
+                "section_id": section_id,
+                "section_name": result.get("section_name", "Unknown Section"),
+                "chunked": True,
+                "chunk_count": len(chunks),
+                "chunk_analyses": batched["chunk_analyses"],
+                "original_length": result.get("original_length", 0)
+            }
+    
+    # Analyze all chunks in one batch that keeps up to CHUNK_ANALYSIS_CONCURRENCY
+    # calls in flight; results come back in input order
+    chunk_prompts = [
+        f"""Analyze part {i+1} of {len(chunks)} from {result.get('section_name', section_id)} section with objective: {analysis_objective}
         
         CONTENT CHUNK {i+1}/{len(chunks)}:
-        {chunk[:12000]}  # Limit chunk size for LLM
+        {chunk}
         
         Provide an analysis of this chunk only. Focus on key points and insights.
         Remember this is part {i+1} of {len(chunks)}, so focus on what's in this specific chunk.
         """
-        try:
-            chunk_analysis = llm.invoke(chunk_prompt)
+        for i, chunk in enumerate(chunks)
+    ]
+    
+    chunk_results = llm.batch(
+        chunk_prompts,
+        config={"max_concurrency": CHUNK_ANALYSIS_CONCURRENCY},
+        return_exceptions=True
+    )
+    for i, chunk_analysis in enumerate(chunk_results):
+        if isinstance(chunk_analysis, Exception):
+            logger.error(f"Error analyzing chunk {i}: {str(chunk_analysis)}")
             chunk_analyses.append({
                 "chunk_index": i,
-                "analysis": chunk_analysis.content
+                "analysis": f"Error analyzing this chunk: {str(chunk_analysis)}"
             })
-        except Exception as e:
-            logger.error(f"Error analyzing chunk {i}: {str(e)}")
+        else:
             chunk_analyses.append({
                 "chunk_index": i,
-                "analysis": f"Error analyzing this chunk: {str(e)}"
+                "analysis": chunk_analysis.content
             })
     
     # Now synthesize the full analysis
-    synthesis_prompt = f"""Synthesize the following analyses of {result.get('section_name', section_id)} section into a cohesive summary.
+    synthesis_parts = [f"""Synthesize the following analyses of {result.get('section_name', section_id)} section into a cohesive summary.
     
     ANALYSIS OBJECTIVE: {analysis_objective}
     
     INDIVIDUAL CHUNK ANALYSES:
-    """
-    
-    for ca in chunk_analyses:
-        synthesis_prompt += f"\n\nCHUNK {ca['chunk_index']+1} ANALYSIS:\n{ca['analysis']}"
-    
-    synthesis_prompt += "\n\nSynthesize these analyses into one cohesive summary that addresses the original objective. Avoid repetition and focus on the most important insights across all chunks."
+    """]
+    synthesis_parts.extend(
+        f"\n\nCHUNK {ca['chunk_index']+1} ANALYSIS:\n{ca['analysis']}" for ca in chunk_analyses
+    )
+    synthesis_parts.append("\n\nSynthesize these analyses into one cohesive summary that addresses the original objective. Avoid repetition and focus on the most important insights across all chunks.")
+    synthesis_prompt = "".join(synthesis_parts)
     
     try:
         final_analysis = llm.invoke(synthesis_prompt)
@@ -544,9 +765,11 @@ def analyze_section_chunks(
         logger.error(f"Error in final synthesis: {str(e)}")
         
         # Fallback: just combine the individual analyses
-        combined_analysis = "ANALYSIS SUMMARY (Error in final synthesis):\n\n"
-        for ca in chunk_analyses:
-            combined_analysis += f"PART {ca['chunk_index']+1} INSIGHTS:\n{ca['analysis']}\n\n"
+        combined_parts = ["ANALYSIS SUMMARY (Error in final synthesis):\n\n"]
+        combined_parts.extend(
+            f"PART {ca['chunk_index']+1} INSIGHTS:\n{ca['analysis']}\n\n" for ca in chunk_analyses
+        )
+        combined_analysis = "".join(combined_parts)
         
         return {
             "is_error": False,
@@ -629,11 +852,8 @@ def create_agent():
         )
     ]
     
-    # Create LLM
-    llm = ChatOpenAI(
-        temperature=0,
-        model=OPENAI_MODEL
-    )
+    # Get the shared LLM client
+    llm = _get_llm(OPENAI_MODEL)
     
     # Create agent
     agent = initialize_agent(
@@ -650,9 +870,14 @@ def create_agent():
 #################################################
 # Main Functionality
 #################################################
+@lru_cache(maxsize=1)
+def _get_agent():
+    """Return the shared SEC agent, creating it on first use"""
+    return create_agent()
+
 def process_query(query: str) -> str:
     """Process a user query using the SEC agent"""
-    agent = create_agent()
+    agent = _get_agent()
     try:
         return agent.invoke(query)["output"]
     except Exception as e:
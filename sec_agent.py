@@ -7,6 +7,7 @@ import os
 import sys
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, TypedDict, Annotated, Callable, Literal
 from dotenv import load_dotenv
 from langgraph.graph import StateGraph
@@ -77,9 +78,11 @@ TOOL_REGISTRY = {
     }
 }
 
+@lru_cache(maxsize=1)
 def create_planning_agent():
     """Create the planning agent with knowledge of SEC filing analysis.
-    This agent is responsible for planning and executing the entire workflow."""
+    This agent is responsible for planning and executing the entire workflow.
+    Built once and reused, since the tools and prompt never change."""
     
     # Format section info for the prompt
     form_10k_sections = "\n".join([f"* \"{section_id}\" - {section_name}" 
@@ -207,7 +210,7 @@ def process_query(query: str) -> Dict[str, Any]:
         
         def planning_and_execution_node(state: State) -> State:
             """Single node that handles both planning and execution."""
-            # Create or get the planning agent
+            # Get the shared planning agent
             planning_agent = create_planning_agent()
             
             # Let the agent decide what to do next
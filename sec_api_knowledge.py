@@ -5,15 +5,20 @@ Contains mappings and helper functions for SEC filing analysis.
 This module is based on the official sec-api-python repository documentation.
 """
 
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Set
+from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
 import re
+import string
+import ahocorasick
 
 #################################################
 # Section ID Mappings - Directly from documentation
 #################################################
 
 # 10-K Section IDs (as specified in sec-api-python documentation)
-FORM_10K_SECTIONS = {
+FORM_10K_SECTIONS = MappingProxyType({
     "1": "Business",
     "1A": "Risk Factors",
     "1B": "Unresolved Staff Comments",
@@ -34,10 +39,10 @@ FORM_10K_SECTIONS = {
     "12": "Security Ownership of Certain Beneficial Owners and Management and Related Stockholder Matters",
     "13": "Certain Relationships and Related Transactions, and Director Independence",
     "14": "Principal Accountant Fees and Services"
-}
+})
 
 # 10-Q Section IDs (as specified in sec-api-python documentation)
-FORM_10Q_SECTIONS = {
+FORM_10Q_SECTIONS = MappingProxyType({
     "part1item1": "Financial Statements",
     "part1item2": "Management's Discussion and Analysis of Financial Condition and Results of Operations",
     "part1item3": "Quantitative and Qualitative Disclosures About Market Risk",
@@ -49,10 +54,10 @@ FORM_10Q_SECTIONS = {
     "part2item4": "Mine Safety Disclosures",
     "part2item5": "Other Information",
     "part2item6": "Exhibits"
-}
+})
 
 # 8-K Items - Commonly used in SEC API queries
-FORM_8K_ITEMS = {
+FORM_8K_ITEMS = MappingProxyType({
     "1.01": "Entry into a Material Definitive Agreement",
     "1.02": "Termination of a Material Definitive Agreement",
     "1.03": "Bankruptcy or Receivership",
@@ -85,7 +90,7 @@ FORM_8K_ITEMS = {
     "7.01": "Regulation FD Disclosure",
     "8.01": "Other Events",
     "9.01": "Financial Statements and Exhibits"
-}
+})
 
 # Common form types used in SEC API queries
 COMMON_FORM_TYPES = {
@@ -103,144 +108,280 @@ COMMON_FORM_TYPES = {
 
 # Common XBRL field names for financial metrics
 # These are the standardized XBRL tags used in SEC filings
-XBRL_METRICS = {
-    "revenue": [
+XBRL_METRICS = MappingProxyType({
+    "revenue": (
         "RevenueFromContractWithCustomerExcludingAssessedTax",
         "Revenues",
         "SalesRevenueNet",
         "RevenueNet",
         "TotalRevenuesAndOtherIncome"
-    ],
-    "net_income": [
+    ),
+    "net_income": (
         "NetIncomeLoss",
         "ProfitLoss",
         "NetIncomeLossAvailableToCommonStockholdersBasic"
-    ],
-    "assets": [
+    ),
+    "assets": (
         "Assets",
         "AssetsCurrent",
         "AssetsNoncurrent",
         "TotalAssets"
-    ],
-    "liabilities": [
+    ),
+    "liabilities": (
         "Liabilities",
         "LiabilitiesCurrent",
         "LiabilitiesNoncurrent",
         "TotalLiabilities"
-    ],
-    "cash": [
+    ),
+    "cash": (
         "CashAndCashEquivalentsAtCarryingValue",
         "CashAndCashEquivalentsPeriodIncreaseDecrease"
-    ],
-    "eps": [
+    ),
+    "eps": (
         "EarningsPerShareBasic",
         "EarningsPerShareDiluted"
-    ],
-    "cash_flow": [
+    ),
+    "cash_flow": (
         "NetCashProvidedByUsedInOperatingActivities",
         "NetCashProvidedByUsedInInvestingActivities",
         "NetCashProvidedByUsedInFinancingActivities"
-    ]
+    )
+})
+
+# Alternative terms used in queries for each financial metric
+METRIC_ALIASES = MappingProxyType({
+    "revenue": ("sales", "top line", "turnover"),
+    "net_income": ("profit", "bottom line", "earnings", "net profit"),
+    "assets": ("total assets", "asset base"),
+    "liabilities": ("debts", "obligations", "total liabilities"),
+    "eps": ("earnings per share", "profit per share"),
+    "cash_flow": ("cash flows", "cash position", "liquidity")
+})
+
+# Query terms that indicate financial data is needed (XBRL-to-JSON API)
+FINANCIAL_TERMS = (
+    "revenue", "income", "profit", "loss", "earnings", "eps", "per share",
+    "assets", "liabilities", "cash", "sales", "margin", "financial statement",
+    "balance sheet", "income statement", "cash flow", "financial data", "financial metrics"
+)
+
+# Query terms that indicate textual analysis of sections is needed (Extractor API)
+ANALYSIS_TERMS = (
+    "risk factors", "business description", "management discussion", "md&a",
+    "properties", "legal proceedings", "disclosure", "controls", "procedures",
+    "directors", "officers", "executive compensation", "risk"
+)
+
+# Section tables by form type
+_SECTION_TABLES = {
+    "10-K": FORM_10K_SECTIONS,
+    "10-Q": FORM_10Q_SECTIONS,
+    "8-K": FORM_8K_ITEMS
+}
+
+# Lowercased (section name, section ID) pairs in table order, for substring lookups
+_SECTION_NAMES_LC = {
+    form_type: [(name.lower(), section_id) for section_id, name in table.items()]
+    for form_type, table in _SECTION_TABLES.items()
+}
+
+# Form type hints used by determine_form_type, grouped by the form they suggest
+# (zero-width so overlapping hints such as "fiscal yearly" are all found)
+_FORM_TYPE_RE = re.compile(
+    r'(?=(?P<annual>10-k|annual report|yearly)'
+    r'|(?P<quarterly>10-q|quarter)'
+    r'|(?P<current>8-k|current report|material event)'
+    r'|(?P<quarter_period>q[1-4])'
+    r'|(?P<annual_period>annual|fiscal year))'
+)
+_FORM_TYPE_PRIORITY = (
+    ("annual", "10-K"),
+    ("quarterly", "10-Q"),
+    ("current", "8-K"),
+    ("quarter_period", "10-Q"),
+    ("annual_period", "10-K")
+)
+
+# Short "<company> <form> <year>" queries, answered without the full analysis.
+# The company part has no digits or dashes so it can't carry a second form or year.
+_FAST_PATH = re.compile(
+    r"(?!.*\b(?:and|versus|vs)\b)"
+    r"\s*(?P<company>[a-z.&' ]+?)\s+(?P<form>10-k|10-q|8-k)\s+(?:(?:for|in)\s+)?(?P<year>20\d{2})\s*[?.]?\s*"
+)
+_FAST_PATH_MAX_LENGTH = 80
+
+# ASCII-only lowercasing for query normalization; the terms matched below are all ASCII
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Date patterns used by extract_date_from_query
+_YEAR_RE = re.compile(r'(?:in|for|during|from)?\s*(?:the\s*year)?\s*(20\d{2})')
+_QUARTER_RE = re.compile(r'(q[1-4]|first quarter|second quarter|third quarter|fourth quarter|1st quarter|2nd quarter|3rd quarter|4th quarter)(?:\s*of)?\s*(20\d{2})')
+
+# Quarter token -> (start, end) month-day range
+_Q_MAP = {
+    "q1": ("01-01", "03-31"), "first": ("01-01", "03-31"), "1st": ("01-01", "03-31"),
+    "q2": ("04-01", "06-30"), "second": ("04-01", "06-30"), "2nd": ("04-01", "06-30"),
+    "q3": ("07-01", "09-30"), "third": ("07-01", "09-30"), "3rd": ("07-01", "09-30"),
+    "q4": ("10-01", "12-31"), "fourth": ("10-01", "12-31"), "4th": ("10-01", "12-31")
+}
+_DATE_RE = re.compile(r'(?:for|on|as of|dated|ending|ended)?\s*(\w+ \d{1,2},? 20\d{2})')
+
+#################################################
+# Query Term Matching
+#################################################
+
+# Lowercased metric name or alias -> canonical metric name
+_ALIAS_TO_METRIC = {
+    alias.lower(): metric
+    for metric in XBRL_METRICS
+    for alias in (metric, *METRIC_ALIASES.get(metric, ()))
+}
+
+def _build_query_automaton() -> ahocorasick.Automaton:
+    """
+    Build one Aho-Corasick automaton over the financial, analysis and metric terms.
+    
+    Each lowercased pattern maps to a list of (kind, value) tags, since a term
+    such as "earnings" can be both a financial term and a metric alias.
+    """
+    automaton = ahocorasick.Automaton()
+    
+    def add(pattern: str, tag: Tuple[str, str]) -> None:
+        key = pattern.lower()
+        tags = automaton.get(key, [])
+        tags.append(tag)
+        automaton.add_word(key, tags)
+    
+    for term in FINANCIAL_TERMS:
+        add(term, ("fin", term))
+    for term in ANALYSIS_TERMS:
+        add(term, ("ana", term))
+    for alias, metric in _ALIAS_TO_METRIC.items():
+        add(alias, ("metric", metric))
+    
+    automaton.make_automaton()
+    return automaton
+
+_QUERY_AUTOMATON = _build_query_automaton()
+
+def _build_section_automaton(sections: Dict[str, str]) -> ahocorasick.Automaton:
+    """Build an automaton over lowercased section names, keeping each section's table position."""
+    automaton = ahocorasick.Automaton()
+    for position, section_name in enumerate(sections.values()):
+        automaton.add_word(section_name.lower(), (position, section_name))
+    automaton.make_automaton()
+    return automaton
+
+# Section name automata by form type
+_SECTION_AUTOMATA = {
+    "10-K": _build_section_automaton(FORM_10K_SECTIONS),
+    "10-Q": _build_section_automaton(FORM_10Q_SECTIONS)
 }
 
+def _find_section_name(form_type: str, query_lc: str) -> Optional[str]:
+    """Return the section name mentioned in a lowercased query, preferring the first in table order."""
+    found = min((match for _, match in _SECTION_AUTOMATA[form_type].iter(query_lc)), default=None)
+    return found[1] if found else None
+
+def _scan_query(query_lc: str) -> Dict[str, Set[str]]:
+    """Scan a lowercased query once and group every matched term by kind."""
+    matches = defaultdict(set)
+    for _, tags in _QUERY_AUTOMATON.iter(query_lc):
+        for kind, value in tags:
+            matches[kind].add(value)
+    return matches
+
 #################################################
 # SEC API Tool Selection
 #################################################
 
+@lru_cache(maxsize=512)
 def is_financial_metric_query(query: str) -> bool:
     """Determine if a query is asking for financial metrics that require XBRL-to-JSON API."""
-    financial_terms = [
-        "revenue", "income", "profit", "loss", "earnings", "eps", "per share",
-        "assets", "liabilities", "cash", "sales", "margin", "financial statement",
-        "balance sheet", "income statement", "cash flow", "financial data", "financial metrics"
-    ]
-    return any(term in query.lower() for term in financial_terms)
+    return _is_financial_metric_query_lc(query.translate(_ASCII_LOWER))
+
+def _is_financial_metric_query_lc(query_lc: str) -> bool:
+    """is_financial_metric_query for an already lowercased query."""
+    return bool(_scan_query(query_lc)["fin"])
 
+@lru_cache(maxsize=512)
 def is_textual_analysis_query(query: str) -> bool:
     """Determine if a query requires textual analysis of specific sections (Extractor API)."""
-    analysis_terms = [
-        "risk factors", "business description", "management discussion", "md&a",
-        "properties", "legal proceedings", "disclosure", "controls", "procedures",
-        "directors", "officers", "executive compensation", "risk"
-    ]
-    return any(term in query.lower() for term in analysis_terms)
+    return _is_textual_analysis_query_lc(query.translate(_ASCII_LOWER))
 
+def _is_textual_analysis_query_lc(query_lc: str) -> bool:
+    """is_textual_analysis_query for an already lowercased query."""
+    return bool(_scan_query(query_lc)["ana"])
+
+@lru_cache(maxsize=512)
 def determine_form_type(query: str) -> str:
     """Determine which SEC form type is being requested in the query."""
-    query = query.lower()
-    
-    # Check for specific form mentions
-    if "10-k" in query or "annual report" in query or "yearly" in query:
-        return "10-K"
-    elif "10-q" in query or "quarter" in query or "quarterly" in query:
-        return "10-Q"
-    elif "8-k" in query or "current report" in query or "material event" in query:
-        return "8-K"
+    return _determine_form_type_lc(query.translate(_ASCII_LOWER))
+
+def _determine_form_type_lc(query_lc: str) -> str:
+    """determine_form_type for an already lowercased query."""
+    found = {match.lastgroup for match in _FORM_TYPE_RE.finditer(query_lc)}
     
-    # Check for time periods that suggest form types
-    if "quarter" in query or "q1" in query or "q2" in query or "q3" in query or "q4" in query:
-        return "10-Q"
-    if "annual" in query or "fiscal year" in query or "yearly" in query:
-        return "10-K"
+    # Specific form mentions win over time periods that suggest form types
+    for group, form_type in _FORM_TYPE_PRIORITY:
+        if group in found:
+            return form_type
     
     # Default to most recent filing for general queries
     return "10-K"
 
+def _find_section_id(form_type: str, section_name_lc: str) -> Optional[str]:
+    """Return the first section ID whose lowercased name contains section_name_lc."""
+    for name_lc, section_id in _SECTION_NAMES_LC.get(form_type, ()):
+        if section_name_lc in name_lc:
+            return section_id
+    return None
+
+# Lowercased full section name -> section ID, matching what a substring lookup returns
+_SECTION_NAME_TO_ID = {
+    form_type: {name_lc: _find_section_id(form_type, name_lc) for name_lc, _ in names}
+    for form_type, names in _SECTION_NAMES_LC.items()
+}
+
 def get_section_id(form_type: str, section_name: str) -> Optional[str]:
     """Get the section ID for a given form type and section name."""
     section_name = section_name.lower()
     
-    if form_type == "10-K":
-        for id, name in FORM_10K_SECTIONS.items():
-            if section_name in name.lower():
-                return id
-    elif form_type == "10-Q":
-        for id, name in FORM_10Q_SECTIONS.items():
-            if section_name in name.lower():
-                return id
-    elif form_type == "8-K":
-        for id, name in FORM_8K_ITEMS.items():
-            if section_name in name.lower():
-                return id
-                
-    return None
+    # Full section names resolve with a single lookup
+    section_id = _SECTION_NAME_TO_ID.get(form_type, {}).get(section_name)
+    if section_id is not None:
+        return section_id
+    
+    # Fall back to matching part of a section name
+    return _find_section_id(form_type, section_name)
 
-def get_xbrl_fields(metric: str) -> List[str]:
+def get_xbrl_fields(metric: str) -> Tuple[str, ...]:
     """Get possible XBRL field names for a given financial metric."""
-    return XBRL_METRICS.get(metric.lower(), [])
+    return XBRL_METRICS.get(metric.lower(), ())
 
 def extract_date_from_query(query: str) -> Optional[Tuple[str, str]]:
     """Extract date information from a query for SEC-API date parameters."""
-    query = query.lower()
-    
+    return _extract_date_from_query_lc(query.translate(_ASCII_LOWER))
+
+def _extract_date_from_query_lc(query: str) -> Optional[Tuple[str, str]]:
+    """extract_date_from_query for an already lowercased query."""
     # Look for year patterns
-    year_pattern = r'(?:in|for|during|from)?\s*(?:the\s*year)?\s*(20\d{2})'
-    year_matches = re.findall(year_pattern, query)
+    year_matches = _YEAR_RE.findall(query)
     
     if year_matches:
         year = year_matches[0]
         return (f"{year}-01-01", f"{year}-12-31")
     
     # Look for quarter patterns
-    quarter_pattern = r'(?:q[1-4]|first quarter|second quarter|third quarter|fourth quarter|1st quarter|2nd quarter|3rd quarter|4th quarter)(?:\s*of)?\s*(20\d{2})'
-    quarter_matches = re.findall(quarter_pattern, query)
+    quarter_match = _QUARTER_RE.search(query)
     
-    if quarter_matches:
-        quarter_text = quarter_matches[0][0].lower()
-        year = quarter_matches[0][1]
-        
-        if "q1" in quarter_text or "first" in quarter_text or "1st" in quarter_text:
-            return (f"{year}-01-01", f"{year}-03-31")
-        elif "q2" in quarter_text or "second" in quarter_text or "2nd" in quarter_text:
-            return (f"{year}-04-01", f"{year}-06-30")
-        elif "q3" in quarter_text or "third" in quarter_text or "3rd" in quarter_text:
-            return (f"{year}-07-01", f"{year}-09-30")
-        elif "q4" in quarter_text or "fourth" in quarter_text or "4th" in quarter_text:
-            return (f"{year}-10-01", f"{year}-12-31")
+    if quarter_match:
+        start, end = _Q_MAP[quarter_match.group(1).split()[0]]
+        year = quarter_match.group(2)
+        return (f"{year}-{start}", f"{year}-{end}")
     
     # Look for specific date mentions
-    specific_date_pattern = r'(?:for|on|as of|dated|ending|ended)?\s*(\w+ \d{1,2},? 20\d{2})'
-    date_matches = re.findall(specific_date_pattern, query)
+    date_matches = _DATE_RE.findall(query)
     
     if date_matches:
         # This would need to be converted to YYYY-MM-DD format
@@ -260,56 +401,96 @@ def analyze_query_for_tools(query: str) -> Dict[str, Any]:
     Returns:
         Dictionary with recommended tools and parameters
     """
-    result = {
-        "query": query,
-        "requires_company_resolution": True,  # Almost always needed first
-        "form_type": determine_form_type(query),
-        "date_range": extract_date_from_query(query),
-        "requires_financial_data": is_financial_metric_query(query),
-        "requires_section_extraction": is_textual_analysis_query(query),
-        "recommended_tools": ["ResolveCompany", "SECQueryAPI"]  # Base tools almost always needed
+    result = {"query": query}
+    
+    # Rebuild lists from the cached tuples so callers can't modify the cache
+    for key, value in _analyze_cached(query.translate(_ASCII_LOWER)):
+        result[key] = list(value) if key in _LIST_FIELDS else value
+    
+    return result
+
+# Result fields that are lists, stored as tuples in the analysis cache
+_LIST_FIELDS = ("recommended_tools", "financial_metrics")
+
+@lru_cache(maxsize=1024)
+def _analyze_cached(query_lc: str) -> Tuple[Tuple[str, Any], ...]:
+    """Analyze a lowercased query and return the result as an immutable tuple of items."""
+    return tuple(
+        (key, tuple(value) if key in _LIST_FIELDS else value)
+        for key, value in _analyze_lc(query_lc).items()
+    )
+
+def _analyze_fast_path(query_lc: str) -> Optional[Dict[str, Any]]:
+    """Analyze a plain "<company> <form> <year>" query, or return None if it isn't one."""
+    if len(query_lc) >= _FAST_PATH_MAX_LENGTH:
+        return None
+    
+    match = _FAST_PATH.fullmatch(query_lc)
+    if match is None:
+        return None
+    
+    # Company names that contain a form hint or a known term need the full analysis
+    company = match.group("company")
+    if _FORM_TYPE_RE.search(company) or next(_QUERY_AUTOMATON.iter(company), None) is not None:
+        return None
+    
+    year = match.group("year")
+    return {
+        "requires_company_resolution": True,
+        "form_type": match.group("form").upper(),
+        "date_range": (f"{year}-01-01", f"{year}-12-31"),
+        "requires_financial_data": False,
+        "requires_section_extraction": False,
+        "recommended_tools": ["ResolveCompany", "SECQueryAPI"]
     }
+
+def _analyze_lc(query_lc: str) -> Dict[str, Any]:
+    """Analyze a lowercased query; the result does not include the "query" field."""
+    # Most queries just name a company, a form and a year
+    fast_result = _analyze_fast_path(query_lc)
+    if fast_result is not None:
+        return fast_result
+    
+    # Find every known term in the query with a single pass
+    matches = _scan_query(query_lc)
+    form_type = _determine_form_type_lc(query_lc)
+    requires_financial_data = bool(matches["fin"])
+    requires_section_extraction = bool(matches["ana"])
+    recommended_tools = ["ResolveCompany", "SECQueryAPI"]  # Base tools almost always needed
     
     # Add XBRL tool if financial data is requested
-    if result["requires_financial_data"]:
-        result["recommended_tools"].append("SECFinancialData")
+    if requires_financial_data:
+        recommended_tools.append("SECFinancialData")
     
     # Add section extraction if textual analysis is requested
-    if result["requires_section_extraction"]:
-        result["recommended_tools"].append("SECExtractSection")
-        
+    if requires_section_extraction:
+        recommended_tools.append("SECExtractSection")
+    
+    result = {
+        "requires_company_resolution": True,  # Almost always needed first
+        "form_type": form_type,
+        "date_range": _extract_date_from_query_lc(query_lc),
+        "requires_financial_data": requires_financial_data,
+        "requires_section_extraction": requires_section_extraction,
+        "recommended_tools": recommended_tools
+    }
+    
+    if requires_section_extraction:
         # Try to determine specific section
-        for section_name in FORM_10K_SECTIONS.values():
-            if section_name.lower() in query.lower():
-                result["section_name"] = section_name
-                result["section_id"] = get_section_id(result["form_type"], section_name)
-                break
-                
-        if "section_id" not in result and result["form_type"] == "10-Q":
-            for section_name in FORM_10Q_SECTIONS.values():
-                if section_name.lower() in query.lower():
-                    result["section_name"] = section_name
-                    result["section_id"] = get_section_id(result["form_type"], section_name)
-                    break
+        section_name = _find_section_name("10-K", query_lc)
+        if section_name is None and form_type == "10-Q":
+            section_name = _find_section_name("10-Q", query_lc)
+        
+        if section_name is not None:
+            result["section_name"] = section_name
+            result["section_id"] = get_section_id(form_type, section_name)
     
     # Determine potential financial metrics of interest
-    if result["requires_financial_data"]:
-        result["financial_metrics"] = []
-        for metric in XBRL_METRICS.keys():
-            if metric in query.lower() or any(alias in query.lower() for alias in get_metric_aliases(metric)):
-                result["financial_metrics"].append(metric)
+    if requires_financial_data:
+        result["financial_metrics"] = [metric for metric in XBRL_METRICS if metric in matches["metric"]]
     
     return result
 
 def get_metric_aliases(metric: str) -> List[str]:
     """Get alternative terms for a financial metric."""
-    aliases = {
-        "revenue": ["sales", "top line", "turnover"],
-        "net_income": ["profit", "bottom line", "earnings", "net profit"],
-        "assets": ["total assets", "asset base"],
-        "liabilities": ["debts", "obligations", "total liabilities"],
-        "eps": ["earnings per share", "profit per share"],
-        "cash_flow": ["cash flows", "cash position", "liquidity"]
-    }
-    
-    return aliases.get(metric, []) 
\ No newline at end of file
+    return list(METRIC_ALIASES.get(metric, ()))
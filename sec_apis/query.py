@@ -8,8 +8,12 @@ from sec_api import QueryApi
 from langchain.tools import StructuredTool
 from langchain.agents import AgentType, initialize_agent
 from langchain_openai import ChatOpenAI
-from typing import List, Optional, Dict, Any, Union
-import json
+from typing import List, Optional, Dict, Any, Union, Iterator, Coroutine
+import asyncio
+import itertools
+import logging
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 ################################
@@ -23,17 +27,24 @@ SEC_API_KEY = os.getenv("SEC_API_KEY")
 # Initialize SEC API client
 queryApi = QueryApi(api_key=SEC_API_KEY)
 
+logger = logging.getLogger(__name__)
+
 ################################
 ## Constants ##
 ## Configuration values ##
 ################################
-VALID_SORT_FIELDS = ["filedAt", "ticker", "companyName", "formType"]
-VALID_SORT_ORDERS = ["asc", "desc"]
+VALID_SORT_FIELDS = frozenset({"filedAt", "ticker", "companyName", "formType"})
+VALID_SORT_ORDERS = frozenset({"asc", "desc"})
 MAX_SIZE = "100"
+_MAX_SIZE_INT = int(MAX_SIZE)
 DEFAULT_SIZE = "10"
 DEFAULT_SORT_FIELD = "filedAt"
 DEFAULT_SORT_ORDER = "desc"
 
+# Query API REST endpoint and concurrency cap for parallel searches
+SEC_API_ENDPOINT = "https://api.sec-api.io"
+MAX_CONCURRENT_REQUESTS = 8
+
 # Common form types from documentation
 COMMON_FORM_TYPES = {
     "10-Q": "Quarterly report",
@@ -81,17 +92,17 @@ def validate_parameters(params: Dict[str, Any]) -> List[str]:
     if "sort" in params and params["sort"]:
         sort_field = list(params["sort"][0].keys())[0]
         if sort_field not in VALID_SORT_FIELDS:
-            errors.append(f"Invalid sort field. Must be one of: {', '.join(VALID_SORT_FIELDS)}")
+            errors.append(f"Invalid sort field. Must be one of: {', '.join(sorted(VALID_SORT_FIELDS))}")
         
         sort_order = params["sort"][0][sort_field]["order"]
         if sort_order not in VALID_SORT_ORDERS:
-            errors.append(f"Invalid sort order. Must be one of: {', '.join(VALID_SORT_ORDERS)}")
+            errors.append(f"Invalid sort order. Must be one of: {', '.join(sorted(VALID_SORT_ORDERS))}")
     
     # Validate size
     if "size" in params:
         try:
             size_int = int(params["size"])
-            if size_int < 1 or size_int > int(MAX_SIZE):
+            if size_int < 1 or size_int > _MAX_SIZE_INT:
                 errors.append(f"Size must be between 1 and {MAX_SIZE}")
         except ValueError:
             errors.append("Size must be a valid number")
@@ -107,7 +118,7 @@ def validate_parameters(params: Dict[str, Any]) -> List[str]:
     
     return errors
 
-def format_filing_result(filing: Dict[str, Any], index: int) -> List[str]:
+def format_filing_result(filing: Dict[str, Any], index: int) -> Iterator[str]:
     """
     Format a single filing result.
     
@@ -115,25 +126,37 @@ def format_filing_result(filing: Dict[str, Any], index: int) -> List[str]:
         filing: Filing data dictionary
         index: Result number
         
-    Returns:
-        List[str]: Formatted lines for the filing
+    Yields:
+        str: Formatted lines for the filing
     """
-    result = [
-        f"\nResult {index}:",
-        f"Company: {filing.get('companyName', 'N/A')} (Ticker: {filing.get('ticker', 'N/A')})",
-        f"Form Type: {filing.get('formType', 'N/A')}",
+    yield (
+        f"\nResult {index}:\n"
+        f"Company: {filing.get('companyName', 'N/A')} (Ticker: {filing.get('ticker', 'N/A')})\n"
+        f"Form Type: {filing.get('formType', 'N/A')}\n"
         f"Filed At: {filing.get('filedAt', 'N/A')}"
-    ]
+    )
     
     # Add items for 8-K filings
     if filing.get('formType') == '8-K' and filing.get('items'):
-        result.append(f"Items: {filing.get('items', 'N/A')}")
+        yield f"Items: {filing.get('items', 'N/A')}"
     
     # Add description if available
     if filing.get('description'):
-        result.append(f"Description: {filing.get('description')}")
+        yield f"Description: {filing.get('description')}"
+
+def _format_filings(filings: List[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Format a list of filing results, numbered from 1.
     
-    return result
+    Args:
+        filings: Filing data dictionaries
+        
+    Returns:
+        Iterator[str]: Formatted lines for every filing
+    """
+    return itertools.chain.from_iterable(
+        format_filing_result(filing, i) for i, filing in enumerate(filings, 1)
+    )
 
 ################################
 ## Tool Function ##
@@ -189,7 +212,7 @@ def search_sec_filings(
         if errors:
             return "Parameter validation failed:\n" + "\n".join(f"- {error}" for error in errors)
         
-        print(f"Executing SEC API query: {json.dumps(search_params, indent=2)}")
+        logger.debug("Executing SEC API query: %s", search_params)
         
         # Call the API
         filings = queryApi.get_filings(search_params)
@@ -199,10 +222,237 @@ def search_sec_filings(
         
         # Format results
         total_filings = filings.get("total", {}).get("value", 0)
-        formatted_results = [f"Found {total_filings} results. Showing first 3:"]
+        lines = itertools.chain(
+            [f"Found {total_filings} results. Showing first 3:"],
+            _format_filings(filings.get("filings", [])[:3])
+        )
+        
+        return "\n".join(lines)
+    
+    except Exception as e:
+        return f"An error occurred while searching SEC filings: {str(e)}"
+
+def search_sec_filings_batch(
+    tickers: List[str],
+    form_type: str = "10-K",
+    filings_per_ticker: int = 1,
+    sort_field: str = DEFAULT_SORT_FIELD,
+    sort_order: str = DEFAULT_SORT_ORDER
+) -> str:
+    """
+    Search SEC filings for several companies with a single QueryApi request.
+    
+    Combines the tickers into one boolean query so comparison queries usually cost
+    one round-trip instead of one per company, then groups the results by ticker.
+    If the combined results were cut off before every company got its filings
+    (a frequent filer can fill the page), those companies are searched on their own.
+    
+    Args:
+        tickers: Company tickers to search for (e.g., ["MSFT", "AAPL"])
+        form_type: Form type to search for (default: "10-K")
+        filings_per_ticker: Number of filings wanted per company (default: 1)
+        sort_field: Field to sort by (default: "filedAt")
+        sort_order: Sort order (default: "desc")
+    
+    Returns:
+        str: Formatted search results grouped by ticker or error message
+    
+    Example:
+        >>> search_sec_filings_batch(["MSFT", "AAPL"], form_type="10-K")
+        "Showing 2 results for 2 companies:
+        
+        === MSFT ===
+        Result 1:
+        Company: MICROSOFT CORP (Ticker: MSFT)
+        ..."
+    """
+    try:
+        if not tickers:
+            return "Parameter validation failed:\n- At least one ticker is required"
+        
+        # Build one query covering every ticker
+        tickers = [ticker.upper() for ticker in tickers]
+        ticker_query = " OR ".join(f"ticker:{ticker}" for ticker in tickers)
+        sort = [{ sort_field: { "order": sort_order } }]
+        search_params = {
+            "query": f'({ticker_query}) AND formType:"{form_type}"',
+            "from": "0",
+            "size": str(len(tickers) * filings_per_ticker),
+            "sort": sort
+        }
+        
+        # Validate parameters
+        errors = validate_parameters(search_params)
+        if errors:
+            return "Parameter validation failed:\n" + "\n".join(f"- {error}" for error in errors)
+        
+        logger.debug("Executing SEC API query: %s", search_params)
+        
+        # Call the API
+        filings = queryApi.get_filings(search_params)
+        
+        if not filings:
+            return "No results found matching your criteria."
+        
+        # Split results back out by ticker, keeping filings_per_ticker for each
+        returned_filings = filings.get("filings", [])
+        filings_by_ticker = {ticker: [] for ticker in tickers}
+        for filing in returned_filings:
+            ticker_filings = filings_by_ticker.get(filing.get("ticker"))
+            if ticker_filings is not None and len(ticker_filings) < filings_per_ticker:
+                ticker_filings.append(filing)
+        
+        # One company filing more often can fill the combined results. If they were
+        # cut off, search for each company still short of filings on its own
+        total_filings = filings.get("total", {}).get("value", 0)
+        if total_filings > len(returned_filings):
+            for ticker, ticker_filings in filings_by_ticker.items():
+                if len(ticker_filings) < filings_per_ticker:
+                    ticker_params = {
+                        "query": f'ticker:{ticker} AND formType:"{form_type}"',
+                        "from": "0",
+                        "size": str(filings_per_ticker),
+                        "sort": sort
+                    }
+                    logger.debug("Executing SEC API query: %s", ticker_params)
+                    ticker_results = queryApi.get_filings(ticker_params) or {}
+                    ticker_filings[:] = ticker_results.get("filings", [])[:filings_per_ticker]
+        
+        # Format results, counting the filings actually shown
+        shown_filings = sum(len(ticker_filings) for ticker_filings in filings_by_ticker.values())
+        formatted_results = [f"Showing {shown_filings} results for {len(tickers)} companies:"]
+        
+        for ticker, ticker_filings in filings_by_ticker.items():
+            formatted_results.append(f"\n=== {ticker} ===")
+            if not ticker_filings:
+                formatted_results.append("No results found for this company.")
+            formatted_results.extend(_format_filings(ticker_filings))
+        
+        return "\n".join(formatted_results)
+    
+    except Exception as e:
+        return f"An error occurred while searching SEC filings: {str(e)}"
+
+async def _post_query(session: aiohttp.ClientSession, search_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send one search request to the Query API REST endpoint.
+    
+    Args:
+        session: Shared aiohttp session
+        search_params: Query API request body
+        
+    Returns:
+        Dict[str, Any]: Query API response
+    """
+    logger.debug("Executing SEC API query: %s", search_params)
+    async with session.post(SEC_API_ENDPOINT, params={"token": SEC_API_KEY}, json=search_params) as response:
+        response.raise_for_status()
+        return await response.json()
+
+async def search_sec_filings_async(
+    query_list: List[str],
+    size: str = DEFAULT_SIZE,
+    sort_field: str = DEFAULT_SORT_FIELD,
+    sort_order: str = DEFAULT_SORT_ORDER
+) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Run several Query API searches concurrently.
+    
+    Used when queries can't be combined into one boolean query, e.g. when each
+    company needs a different form type or date range. All requests share one
+    connection pool capped at MAX_CONCURRENT_REQUESTS to respect rate limits.
+    
+    Args:
+        query_list: Search queries following SEC-API query syntax
+        size: Number of results to return per query (max 100, default: 10)
+        sort_field: Field to sort by (default: "filedAt")
+        sort_order: Sort order (default: "desc")
+    
+    Returns:
+        List: Query API response for each query, in input order, or the
+        exception raised by that request
+    """
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(
+            *(
+                _post_query(session, {
+                    "query": query,
+                    "from": "0",
+                    "size": size,
+                    "sort": [{ sort_field: { "order": sort_order } }]
+                })
+                for query in query_list
+            ),
+            return_exceptions=True
+        )
+
+def _run_async(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    asyncio.run fails when an event loop is already running in this thread
+    (an async agent or Jupyter), so in that case it runs in a worker thread.
+    
+    Args:
+        coroutine: Coroutine to run
+        
+    Returns:
+        Any: The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+def search_sec_filings_many(
+    queries: List[str],
+    size: str = DEFAULT_SIZE,
+    sort_field: str = DEFAULT_SORT_FIELD,
+    sort_order: str = DEFAULT_SORT_ORDER
+) -> str:
+    """
+    Search SEC filings for several independent queries in parallel.
+    
+    Safe to call from async code: if an event loop is already running, the
+    searches run on their own loop in a worker thread.
+    
+    Args:
+        queries: Search queries following SEC-API query syntax. Example:
+            ['ticker:MSFT AND formType:"10-K"', 'ticker:AAPL AND formType:"10-Q"']
+        size: Number of results to return per query (max 100, default: 10)
+        sort_field: Field to sort by (default: "filedAt")
+        sort_order: Sort order (default: "desc")
+    
+    Returns:
+        str: Formatted search results for each query or error message
+    """
+    try:
+        # Validate parameters
+        errors = validate_parameters({
+            "size": size,
+            "sort": [{ sort_field: { "order": sort_order } }]
+        })
+        if errors:
+            return "Parameter validation failed:\n" + "\n".join(f"- {error}" for error in errors)
+        
+        results = _run_async(search_sec_filings_async(queries, size, sort_field, sort_order))
         
-        for i, filing in enumerate(filings.get("filings", [])[:3], 1):
-            formatted_results.extend(format_filing_result(filing, i))
+        # Format results for each query
+        formatted_results = []
+        for query, filings in zip(queries, results):
+            formatted_results.append(f"\n=== {query} ===")
+            if isinstance(filings, Exception):
+                formatted_results.append(f"An error occurred while searching SEC filings: {str(filings)}")
+            elif not filings:
+                formatted_results.append("No results found matching your criteria.")
+            else:
+                total_filings = filings.get("total", {}).get("value", 0)
+                formatted_results.append(f"Found {total_filings} results. Showing first 3:")
+                formatted_results.extend(_format_filings(filings.get("filings", [])[:3]))
         
         return "\n".join(formatted_results)
     
@@ -241,10 +491,28 @@ sec_tool = StructuredTool.from_function(
     """
 )
 
+# Batch tool for comparing several companies in one request
+sec_batch_tool = StructuredTool.from_function(
+    func=search_sec_filings_batch,
+    name="sec_filing_batch_search",
+    description="""Search SEC filings for several companies at once, usually with a single request.
+    
+    Use this instead of sec_filing_search when a question compares or covers
+    more than one company (e.g., "Compare Microsoft and Apple's latest 10-K").
+    
+    Parameters:
+    - tickers: List of company tickers (e.g., ["MSFT", "AAPL"])
+    - form_type: Form type to search for (default: "10-K")
+    - filings_per_ticker: Number of filings per company (default: 1)
+    - sort_field: Field to sort by (filedAt, ticker, companyName, formType)
+    - sort_order: Sort order (asc/desc)
+    """
+)
+
 # Create LLM and agent
 llm = ChatOpenAI(temperature=0, openai_api_key=OPENAI_API_KEY)
 agent = initialize_agent(
-    [sec_tool],
+    [sec_tool, sec_batch_tool],
     llm,
     agent=AgentType.OPENAI_FUNCTIONS,
     verbose=True
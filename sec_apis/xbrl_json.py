@@ -1,8 +1,44 @@
 from sec_api import XbrlApi
 import os
+import copy
+import logging
+import diskcache
 from dotenv import load_dotenv
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
+logger = logging.getLogger(__name__)
+
+# XBRL data for a filed accession number never changes, so conversions are cached
+XBRL_CACHE_DIR = os.path.expanduser("~/.cache/sec_xbrl")
+XBRL_CACHE_EXPIRE = 90 * 24 * 3600  # 90 days, same as the chunking analyzer's filing cache
+_XBRL_CACHE = diskcache.Cache(XBRL_CACHE_DIR)
+
+# One client shared by every tool instance. XbrlApi only holds the API key and
+# endpoint (requests are sent with module-level requests calls), so this saves
+# the repeated construction but keeps no connections open
+_XBRL_API = None
+
+def _get_xbrl_api(api_key: str) -> XbrlApi:
+    """Return the shared XbrlApi client, creating it on first use."""
+    global _XBRL_API
+    if _XBRL_API is None:
+        _XBRL_API = XbrlApi(api_key)
+    return _XBRL_API
+
+@lru_cache(maxsize=128)
+def _xbrl_to_json_cached(api_key: str, input_type: str, value: str) -> Dict[str, Any]:
+    """Convert XBRL to JSON, checking the in-process and on-disk caches first.
+    The result is shared between callers, so it must not be modified."""
+    key = f"{input_type}:{value}"
+    if key in _XBRL_CACHE:
+        return _XBRL_CACHE[key]
+    
+    result = _get_xbrl_api(api_key).xbrl_to_json(**{input_type: value})
+    if result:
+        _XBRL_CACHE.set(key, result, expire=XBRL_CACHE_EXPIRE)
+    return result
+
 class SECXbrlTool:
     """SEC XBRL-to-JSON Converter Tool following sec-api-python documentation"""
     
@@ -11,7 +47,11 @@ class SECXbrlTool:
         self.api_key = os.getenv("SEC_API_KEY")
         if not self.api_key:
             raise ValueError("SEC API key is required. Set it in .env file.")
-        self.xbrl_api = XbrlApi(self.api_key)
+        self.xbrl_api = _get_xbrl_api(self.api_key)
+
+    def _cached_xbrl_to_json(self, input_type: str, value: str) -> Dict[str, Any]:
+        """Convert XBRL to JSON through the shared caches, returning a copy the caller can modify."""
+        return copy.deepcopy(_xbrl_to_json_cached(self.api_key, input_type, value))
 
     def xbrl_to_json(self, 
                      htm_url: Optional[str] = None,
@@ -25,14 +65,14 @@ class SECXbrlTool:
             
             # Call appropriate API method
             if htm_url:
-                return self.xbrl_api.xbrl_to_json(htm_url=htm_url)
+                return self._cached_xbrl_to_json("htm_url", htm_url)
             elif xbrl_url:
-                return self.xbrl_api.xbrl_to_json(xbrl_url=xbrl_url)
+                return self._cached_xbrl_to_json("xbrl_url", xbrl_url)
             else:
-                return self.xbrl_api.xbrl_to_json(accession_no=accession_no)
+                return self._cached_xbrl_to_json("accession_no", accession_no)
             
         except Exception as e:
-            print(f"Error: {str(e)}")
+            logger.error("Error: %s", e)
             return None
 
 def test_documentation_examples():